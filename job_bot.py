@@ -1,25 +1,53 @@
+import hashlib
 import os
-import time
+import queue
+import re
+import shutil
+import sqlite3
+import threading
 import uuid
-from datetime import datetime
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timezone
 
+import orjson
+from argon2 import PasswordHasher
+from argon2.exceptions import VerifyMismatchError
 from flask import Flask, request, jsonify
+from flask.json.provider import DefaultJSONProvider
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError
 from werkzeug.utils import secure_filename
 
-# Parsing
-import spacy
-from pdfminer.high_level import extract_text
+# Parsing (spaCy is imported lazily in _get_nlp)
+import pypdfium2 as pdfium
 
 # Automation & Scheduling
 from selenium import webdriver
+from selenium.common.exceptions import WebDriverException
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+from apscheduler.executors.pool import ThreadPoolExecutor as APSThreadPoolExecutor
 from apscheduler.schedulers.background import BackgroundScheduler
 
 
+class OrjsonProvider(DefaultJSONProvider):
+    """orjson-backed serialization; datetimes are emitted natively."""
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, option=orjson.OPT_NAIVE_UTC).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+
 def create_app(config_overrides=None):
     app = Flask(__name__)
+    app.json = OrjsonProvider(app)
 
     # Configuration
     default_config = {
@@ -27,25 +55,42 @@ def create_app(config_overrides=None):
         'SECRET_KEY': os.getenv('SECRET_KEY', 'change_this_secret'),
         'UPLOAD_FOLDER': os.getenv('UPLOAD_FOLDER', 'uploads'),
         'MAX_CONTENT_LENGTH': 16 * 1024 * 1024,  # 16MB limit
+        'MAX_FORM_MEMORY_SIZE': 512 * 1024,  # spool bigger uploads to tempfile
         'SCHEDULER_API_ENABLED': True
     }
     app.config.update(default_config)
     if config_overrides:
         app.config.update(config_overrides)
 
+    # Memory SQLite databases use StaticPool, which accepts no sizing, so
+    # only ask for a sized pool on file-backed URIs. Overrides win.
+    uri = app.config['SQLALCHEMY_DATABASE_URI']
+    in_memory = uri.startswith('sqlite') and (
+        ':memory:' in uri or 'mode=memory' in uri or uri.endswith('//'))
+    engine_options = {'pool_pre_ping': True}
+    if not in_memory:
+        engine_options['pool_size'] = 10
+    app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', engine_options)
+
+    # Keep a handle for scheduler/executor threads, which run outside any
+    # request and need an app context for the ORM session.
+    global _flask_app
+    _flask_app = app
+
     # Extensions
     db.init_app(app)
-    scheduler.init_app(app)
-    scheduler.start()
+    # Raw apscheduler has no init_app; just start it once.
+    if not scheduler.running:
+        scheduler.start()
 
     # Create upload folder
     os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 
-    # Initialize NLP
-    nlp = spacy.load('en_core_web_sm')
+    # Start the batch parse worker (it loads spaCy on demand)
+    start_parse_worker()
 
     # Register routes
-    register_routes(app, nlp)
+    register_routes(app)
 
     with app.app_context():
         db.create_all()
@@ -54,8 +99,46 @@ def create_app(config_overrides=None):
 
 
 # Initialize extensions outside create_app for potential reuse/testing
+_flask_app = None  # set by create_app
 db = SQLAlchemy()
-scheduler = BackgroundScheduler()
+# Explicit thread pool: with the defaults, applications scheduled for the
+# same instant run one behind the other.
+scheduler = BackgroundScheduler(
+    executors={'default': APSThreadPoolExecutor(max_workers=20)},
+    job_defaults={'max_instances': 10, 'coalesce': False,
+                  'misfire_grace_time': 30})
+password_hasher = PasswordHasher()
+
+
+@event.listens_for(Engine, 'connect')
+def _set_sqlite_pragmas(dbapi_conn, _connection_record):
+    # WAL lets scheduler threads commit while request threads read, instead
+    # of everything serializing on the rollback-journal file lock.
+    if isinstance(dbapi_conn, sqlite3.Connection):
+        cursor = dbapi_conn.cursor()
+        cursor.execute('PRAGMA journal_mode=WAL')
+        cursor.execute('PRAGMA synchronous=NORMAL')
+        cursor.execute('PRAGMA cache_size=-64000')
+        cursor.close()
+
+
+_nlp = None
+_nlp_lock = threading.Lock()
+
+
+def _get_nlp():
+    # Imported and loaded on first use so workers that never parse a resume
+    # skip the ~1-2s / ~50MB model load entirely; repeated calls share the
+    # singleton. Only NER output is used, so skip the other stages.
+    global _nlp
+    if _nlp is None:
+        with _nlp_lock:
+            if _nlp is None:
+                import spacy
+                _nlp = spacy.load(
+                    'en_core_web_sm',
+                    disable=['tagger', 'parser', 'attribute_ruler', 'lemmatizer'])
+    return _nlp
 
 
 # Database models
@@ -74,6 +157,10 @@ class Job(db.Model):
     company = db.Column(db.String(200), nullable=False)
     location = db.Column(db.String(100))
     apply_link = db.Column(db.String(500))
+    __table_args__ = (
+        db.Index('ix_job_title_company_link', 'title', 'company', 'apply_link',
+                 unique=True),
+    )
 
 
 class Application(db.Model):
@@ -82,39 +169,203 @@ class Application(db.Model):
     job_id = db.Column(db.Integer, db.ForeignKey('job.id'), nullable=False)
     status = db.Column(db.String(50), default='Pending')
     applied_at = db.Column(db.DateTime)
+    job = db.relationship('Job')
+    __table_args__ = (
+        db.Index('ix_app_user_job', 'user_id', 'job_id', unique=True),
+        db.Index('ix_app_user', 'user_id'),
+    )
 
 
 # Helper functions
 
-def parse_resume(file_path, nlp):
-    text = extract_text(file_path)
-    doc = nlp(text)
+# Resume parsing is throughput-bound, so texts are funneled through a single
+# background worker that drains a queue and runs them through nlp.pipe() in
+# batches instead of one nlp(text) call per request.
+PARSE_BATCH_SIZE = 32
+
+# Cheap extraction fast path: regex for emails, a capitalized-line heuristic
+# for names, and plain set membership for skills. spaCy NER is only a
+# fallback for names the heuristic misses.
+EMAIL_RE = re.compile(r'[\w.+-]+@[\w-]+\.[\w.-]+')
+SKILLS = ('python', 'sql', 'tableau', 'power bi', 'machine learning', 'excel')
+# Single-scan matcher that, unlike token-set membership, also catches
+# multi-word skills such as 'power bi'.
+SKILL_RE = re.compile(r'\b(?:' + '|'.join(re.escape(s) for s in SKILLS) + r')\b')
+
+_parse_queue = queue.Queue()
+_parse_worker_lock = threading.Lock()
+_parse_worker_started = False
+
+# Re-uploads of an identical PDF are O(1): parsed output is cached by the
+# file's SHA-256 digest. Swap for Redis in multi-worker deployments.
+PARSE_CACHE_SIZE = 1024
+
+_parse_cache = OrderedDict()
+_parse_cache_lock = threading.Lock()
+
+
+def _parse_cache_get(digest):
+    with _parse_cache_lock:
+        parsed = _parse_cache.get(digest)
+        if parsed is not None:
+            _parse_cache.move_to_end(digest)
+        return parsed
+
 
-    parsed = {'name': None, 'email': None, 'skills': []}
-    # Extract entities
-    for ent in doc.ents:
-        if ent.label_ == 'PERSON' and not parsed['name']:
-            parsed['name'] = ent.text
-        elif ent.label_ == 'EMAIL':
-            parsed['email'] = ent.text
+def _parse_cache_put(digest, parsed):
+    with _parse_cache_lock:
+        _parse_cache[digest] = parsed
+        if len(_parse_cache) > PARSE_CACHE_SIZE:
+            _parse_cache.popitem(last=False)
 
-    # Skill matching
-    tokens = {t.text.lower() for t in doc if not t.is_stop}
-    skills = [s for s in ['python', 'sql', 'tableau', 'power bi', 'machine learning', 'excel'] if s in tokens]
-    parsed['skills'] = skills
-    return parsed
+
+def extract_pdf_text(file_path):
+    """Extract text with pypdfium2's C core (far faster than pdfminer)."""
+    pdf = pdfium.PdfDocument(file_path)
+    try:
+        return '\n'.join(page.get_textpage().get_text_range() for page in pdf)
+    finally:
+        pdf.close()
+
+
+def _guess_name(text):
+    """Return the first capitalized line, a good proxy for resume headers."""
+    for line in text.splitlines():
+        line = line.strip()
+        if line and line[0].isupper() and '@' not in line and len(line.split()) <= 4:
+            return line
+    return None
+
+
+def parse_resume(items):
+    """Parse a batch of (user_id, text) pairs, batching any spaCy fallbacks."""
+    results = []
+    fallback = []
+    for index, (_, text) in enumerate(items):
+        email_match = EMAIL_RE.search(text)
+        found = set(SKILL_RE.findall(text.lower()))
+        parsed = {
+            'name': _guess_name(text),
+            'email': email_match.group(0) if email_match else None,
+            'skills': [s for s in SKILLS if s in found],
+        }
+        results.append(parsed)
+        if parsed['name'] is None:
+            fallback.append(index)
+
+    if fallback:
+        docs = _get_nlp().pipe([items[i][1] for i in fallback],
+                               batch_size=PARSE_BATCH_SIZE, n_process=1)
+        for index, doc in zip(fallback, docs):
+            for ent in doc.ents:
+                if ent.label_ == 'PERSON':
+                    results[index]['name'] = ent.text
+                    break
+    return results
+
+
+def submit_parse(user_id, text):
+    """Queue a resume text for the batch worker and return a Future."""
+    future = Future()
+    _parse_queue.put((user_id, text, future))
+    return future
+
+
+def _drain_parse_queue():
+    while True:
+        batch = [_parse_queue.get()]
+        while len(batch) < PARSE_BATCH_SIZE:
+            try:
+                batch.append(_parse_queue.get_nowait())
+            except queue.Empty:
+                break
+        try:
+            parsed = parse_resume([(user_id, text) for user_id, text, _ in batch])
+        except Exception as exc:
+            for _, _, future in batch:
+                future.set_exception(exc)
+            continue
+        for (_, _, future), result in zip(batch, parsed):
+            future.set_result(result)
+
+
+def start_parse_worker():
+    global _parse_worker_started
+    with _parse_worker_lock:
+        if _parse_worker_started:
+            return
+        threading.Thread(target=_drain_parse_queue, daemon=True).start()
+        _parse_worker_started = True
+
+
+class DriverPool:
+    """Reuses Chrome sessions: driver startup costs ~1-2s per application."""
+
+    def __init__(self, size=2):
+        self._size = size
+        self._created = 0
+        self._lock = threading.Lock()
+        self._drivers = queue.Queue()
+
+    @staticmethod
+    def _new_driver():
+        options = Options()
+        options.add_argument('--headless')
+        options.add_argument('--no-sandbox')
+        options.add_argument('--disable-dev-shm-usage')
+        return webdriver.Chrome(options=options)
+
+    def get(self):
+        try:
+            return self._drivers.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._created < self._size:
+                self._created += 1
+                return self._new_driver()
+        return self._drivers.get()
+
+    def put(self, driver):
+        try:
+            driver.delete_all_cookies()  # isolate users between sessions
+        except WebDriverException:
+            # Session died mid-run; replace it so waiters are not starved
+            try:
+                driver.quit()
+            except WebDriverException:
+                pass
+            try:
+                self._drivers.put(self._new_driver())
+            except WebDriverException:
+                # Can't create one right now; free the slot for the next get()
+                with self._lock:
+                    self._created -= 1
+            return
+        self._drivers.put(driver)
+
+
+DRIVER_POOL_SIZE = int(os.getenv('DRIVER_POOL_SIZE', '2'))
+
+driver_pool = DriverPool(size=DRIVER_POOL_SIZE)
+
+# Selenium sessions run on their own small executor, sized to the driver
+# pool, so scheduler workers are not parked for the full page-load wait.
+_selenium_executor = ThreadPoolExecutor(max_workers=DRIVER_POOL_SIZE,
+                                        thread_name_prefix='selenium')
 
 
 def run_selenium_apply(apply_link, resume_path):
-    options = Options()
-    options.add_argument('--headless')
-    driver = webdriver.Chrome(options=options)
+    driver = driver_pool.get()
     try:
         driver.get(apply_link)
-        time.sleep(2)
+        # Wait for actual DOM readiness instead of a fixed 2s sleep;
+        # tighten to the apply-button selector once site logic lands.
+        WebDriverWait(driver, 10).until(
+            EC.presence_of_element_located((By.TAG_NAME, 'body')))
         # implement site-specific logic with robust element checks
     finally:
-        driver.quit()
+        driver_pool.put(driver)
 
 
 def schedule_application(user_id, job_id, run_time):
@@ -124,20 +375,39 @@ def schedule_application(user_id, job_id, run_time):
 
 
 def execute_application(user_id, job_id):
-    user = User.query.get(user_id)
-    job = Job.query.get(job_id)
-    if not (user and job):
+    # Runs on a scheduler worker with no request context
+    with _flask_app.app_context():
+        # One joined round-trip instead of sequential per-table lookups
+        # under the scheduler thread's connection.
+        row = (db.session.query(User, Job)
+               .select_from(User)
+               .join(Job, Job.id == job_id)
+               .filter(User.id == user_id)
+               .first())
+        if row is None:
+            return
+        user, job = row
+        apply_link, resume_path = job.apply_link, user.resume_path
+    future = _selenium_executor.submit(run_selenium_apply,
+                                       apply_link, resume_path)
+    future.add_done_callback(
+        lambda f: _record_application(user_id, job_id, f))
+
+
+def _record_application(user_id, job_id, future):
+    if future.exception() is not None:
         return
-    run_selenium_apply(job.apply_link, user.resume_path)
-    application = Application.query.filter_by(user_id=user_id, job_id=job_id).first()
-    if application:
-        application.status = 'Applied'
-        application.applied_at = datetime.utcnow()
-    else:
-        application = Application(user_id=user_id, job_id=job_id,
-                                  status='Applied', applied_at=datetime.utcnow())
-        db.session.add(application)
-    db.session.commit()
+    # Fires on the selenium executor thread, which has no app context
+    with _flask_app.app_context():
+        application = Application.query.filter_by(user_id=user_id, job_id=job_id).first()
+        if application:
+            application.status = 'Applied'
+            application.applied_at = datetime.utcnow()
+        else:
+            application = Application(user_id=user_id, job_id=job_id,
+                                      status='Applied', applied_at=datetime.utcnow())
+            db.session.add(application)
+        db.session.commit()
 
 
 def scrape_jobs(keyword, location):
@@ -148,17 +418,16 @@ def scrape_jobs(keyword, location):
     ]
 
 
-def register_routes(app, nlp):
+def register_routes(app):
     @app.route('/register', methods=['POST'])
     def register():
         data = request.json or {}
         email = data.get('email'); password = data.get('password')
         if not email or not password:
             return jsonify(error='Email and password required'), 400
-        if User.query.filter_by(email=email).first():
+        if db.session.query(db.exists().where(User.email == email)).scalar():
             return jsonify(error='Email exists'), 400
-        # TODO: hash password before storing
-        user = User(email=email, password=password,
+        user = User(email=email, password=password_hasher.hash(password),
                     location=data.get('location'), experience=data.get('experience'))
         db.session.add(user); db.session.commit()
         return jsonify(message='Registered'), 201
@@ -167,14 +436,18 @@ def register_routes(app, nlp):
     def login():
         data = request.json or {}
         user = User.query.filter_by(email=data.get('email')).first()
-        if user and user.password == data.get('password'):
-            return jsonify(message='Login successful', user_id=user.id)
+        if user:
+            try:
+                password_hasher.verify(user.password, data.get('password') or '')
+                return jsonify(message='Login successful', user_id=user.id)
+            except VerifyMismatchError:
+                pass
         return jsonify(error='Invalid credentials'), 401
 
     @app.route('/upload_resume', methods=['POST'])
     def upload_resume_route():
         user_id = request.form.get('user_id')
-        user = User.query.get(user_id) or None
+        user = db.session.get(User, user_id)
         if not user:
             return jsonify(error='Invalid user ID'), 400
         file = request.files.get('resume')
@@ -183,22 +456,69 @@ def register_routes(app, nlp):
         filename = secure_filename(file.filename)
         unique = f"{uuid.uuid4()}_{filename}"
         path = os.path.join(app.config['UPLOAD_FOLDER'], unique)
-        file.save(path)
-        parsed = parse_resume(path, nlp)
+        # Stream to disk in 1MB chunks instead of file.save's 16KB copy loop
+        with open(path, 'wb', buffering=1024 * 1024) as out:
+            shutil.copyfileobj(file.stream, out, length=1024 * 1024)
+        with open(path, 'rb') as saved:
+            digest = hashlib.file_digest(saved, 'sha256').hexdigest()
+        parsed = _parse_cache_get(digest)
+        if parsed is None:
+            text = extract_pdf_text(path)
+            parsed = submit_parse(user.id, text).result()
+            _parse_cache_put(digest, parsed)
         user.resume_path = path; db.session.commit()
         return jsonify(message='Uploaded', parsed_data=parsed)
 
     @app.route('/search_jobs', methods=['GET'])
     def search_jobs_route():
-        user = User.query.get(request.args.get('user_id'))
+        user = db.session.get(User, request.args.get('user_id'))
         if not user:
             return jsonify(error='Invalid user ID'), 400
-        jobs = scrape_jobs(request.args.get('keyword', ''), user.location)
+        scraped = scrape_jobs(request.args.get('keyword', ''), user.location)
+        # Dedup on the same columns the unique index enforces
+        keys = {(j['title'], j['company'], j['apply_link']) for j in scraped}
+        existing = Job.query.filter(
+            db.tuple_(Job.title, Job.company, Job.apply_link).in_(keys)).all()
+        by_key = {(job.title, job.company, job.apply_link): job for job in existing}
+        missing = []
+        for j in scraped:
+            key = (j['title'], j['company'], j['apply_link'])
+            if key not in by_key:
+                job = Job(**j)
+                by_key[key] = job
+                missing.append(job)
+        if missing:
+            # add_all (unlike bulk_save_objects) populates primary keys,
+            # which the response below needs; still one transaction.
+            db.session.add_all(missing)
+            try:
+                db.session.commit()
+            except IntegrityError:
+                # Lost a race with a concurrent insert: the rollback threw
+                # away the whole batch, so re-read the winners and retry
+                # each remaining row so every job ends up with a real id.
+                db.session.rollback()
+                existing = Job.query.filter(
+                    db.tuple_(Job.title, Job.company, Job.apply_link).in_(keys)).all()
+                by_key.update({(job.title, job.company, job.apply_link): job
+                               for job in existing})
+                for j in scraped:
+                    key = (j['title'], j['company'], j['apply_link'])
+                    if by_key[key].id is not None:
+                        continue
+                    job = Job(**j)
+                    db.session.add(job)
+                    try:
+                        db.session.commit()
+                    except IntegrityError:
+                        db.session.rollback()
+                        job = Job.query.filter_by(
+                            title=j['title'], company=j['company'],
+                            apply_link=j['apply_link']).first()
+                    by_key[key] = job
         response = []
-        for j in jobs:
-            job = Job.query.filter_by(**j).first()
-            if not job:
-                job = Job(**j); db.session.add(job); db.session.commit()
+        for j in scraped:
+            job = by_key[(j['title'], j['company'], j['apply_link'])]
             response.append({
                 'job_id': job.id, 'title': job.title,
                 'company': job.company, 'location': job.location,
@@ -209,39 +529,50 @@ def register_routes(app, nlp):
     @app.route('/apply_job', methods=['POST'])
     def apply_job_route():
         data = request.json or {}
-        user = User.query.get(data.get('user_id')); job = Job.query.get(data.get('job_id'))
+        user = db.session.get(User, data.get('user_id')); job = db.session.get(Job, data.get('job_id'))
         if not (user and job):
             return jsonify(error='Invalid IDs'), 400
-        if Application.query.filter_by(user_id=user.id, job_id=job.id).first():
+        # Existence-only check: fetch the id instead of hydrating the row
+        if db.session.query(Application.id).filter_by(
+                user_id=user.id, job_id=job.id).first() is not None:
             return jsonify(error='Already applied'), 400
         app_record = Application(user_id=user.id, job_id=job.id)
         db.session.add(app_record); db.session.commit()
         schedule_time = data.get('schedule_time')
         if schedule_time:
             try:
-                dt = datetime.strptime(schedule_time, '%Y-%m-%d %H:%M:%S')
+                # C-backed ISO-8601 parser; also accepts the previous
+                # 'YYYY-MM-DD HH:MM:SS' format.
+                dt = datetime.fromisoformat(schedule_time)
                 schedule_application(user.id, job.id, dt)
                 return jsonify(message=f'Scheduled at {schedule_time}')
-            except ValueError:
+            except (TypeError, ValueError):
                 return jsonify(error='Invalid datetime'), 400
-        execute_application(user.id, job.id)
-        return jsonify(message='Applied immediately')
+        # Dispatch through the scheduler instead of blocking the Flask
+        # worker on the Selenium session; clients poll the status URL.
+        # The run time must be timezone-aware or APScheduler reads it in
+        # local time and can discard it as misfired.
+        schedule_application(user.id, job.id, datetime.now(timezone.utc))
+        return jsonify(
+            message='Application queued',
+            status_url=f'/application_status?user_id={user.id}'), 202
 
     @app.route('/application_status', methods=['GET'])
     def application_status_route():
-        user = User.query.get(request.args.get('user_id'))
+        user = db.session.get(User, request.args.get('user_id'))
         if not user:
             return jsonify(error='Invalid user ID'), 400
-        apps = Application.query.filter_by(user_id=user.id).all()
+        apps = (Application.query
+                .options(db.joinedload(Application.job))
+                .filter_by(user_id=user.id).all())
         result = []
         for a in apps:
-            job = Job.query.get(a.job_id)
             result.append({
                 'application_id': a.id,
-                'job_title': job.title,
-                'company': job.company,
+                'job_title': a.job.title,
+                'company': a.job.company,
                 'status': a.status,
-                'applied_at': a.applied_at.isoformat() if a.applied_at else None
+                'applied_at': a.applied_at  # orjson serializes datetime natively
             })
         return jsonify(applications=result)
 